@@ -1,11 +1,19 @@
 import streamlit as st
-import requests
-import json
+import orjson
 import os
+import asyncio
+import hashlib
+import html
 from datetime import datetime
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 
+from cache import ResponseCache
+from config import CUSTOM_CSS, EMERGENCY_KEYWORDS, QUICK_HEALTH_TOPICS
+from medbot_cache import SemanticCache
+
 # Page configuration
 st.set_page_config(
     page_title="MedBot - Medical Assistant",
@@ -14,64 +22,84 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Static HTML blocks rendered on every run
+_HEADER_HTML = """
+<div class="main-header">
+    <h1>🏥 MedBot - Your Medical Assistant</h1>
+    <p>AI-powered health information and guidance</p>
+</div>
+"""
+
+_DISCLAIMER_HTML = """
+<div class="disclaimer-box">
+    <h4>⚠️ Important Medical Disclaimer</h4>
+    <p>This chatbot provides general health information only and is not a substitute for professional medical advice, diagnosis, or treatment. Always consult with a qualified healthcare provider for medical concerns.</p>
+</div>
+"""
+
+@st.cache_resource
+def _inject_css():
+    """Render the custom CSS once per session instead of on every rerun"""
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+@st.cache_resource
+def _render_header():
+    st.markdown(_HEADER_HTML, unsafe_allow_html=True)
+
+@st.cache_resource
+def _render_disclaimer():
+    st.markdown(_DISCLAIMER_HTML, unsafe_allow_html=True)
+
 # Custom CSS for better styling
-st.markdown("""
-<style>
-    .main-header {
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        padding: 1rem;
-        border-radius: 10px;
-        color: white;
-        text-align: center;
-        margin-bottom: 1rem;
-    }
-    
-    .disclaimer-box {
-        background-color: #fff3cd;
-        border: 1px solid #ffeaa7;
-        border-radius: 5px;
-        padding: 15px;
-        margin: 10px 0;
-    }
-    
-    .emergency-button {
-        background-color: #e74c3c;
-        color: white;
-        padding: 10px 20px;
-        border-radius: 5px;
-        text-align: center;
-        font-weight: bold;
-    }
-    
-    .user-message {
-        background-color: #e3f2fd;
-        padding: 10px;
-        border-radius: 10px;
-        margin: 5px 0;
-        border-left: 4px solid #2196f3;
-    }
-    
-    .bot-message {
-        background-color: #f1f8e9;
-        padding: 10px;
-        border-radius: 10px;
-        margin: 5px 0;
-        border-left: 4px solid #4caf50;
-    }
-</style>
-""", unsafe_allow_html=True)
+_inject_css()
 
 class OpenRouterClient:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, disk_cache: ResponseCache = None):
+        # Deferred so Streamlit cold start doesn't pay the import cost
+        # before the page renders; first construction hits the module cache
+        import requests
+
         self.api_key = api_key
         self.base_url = "https://openrouter.ai/api/v1/chat/completions"
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "HTTP-Referer": "https://streamlit.io",
-            "X-Title": "Medical Chatbot"
+            "X-Title": "Medical Chatbot",
+            "Content-Type": "application/json"
         }
-    
+        # Pooled session keeps TCP/TLS connections alive between calls
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self._cache = {}
+        self._disk_cache = disk_cache
+        # Created on first use; shared so async calls reuse keepalive
+        # connections the same way the sync Session does
+        self._async_client = None
+        self._loop = None
+
+    def _cache_key(self, messages: List[Dict], model: str, temperature: float) -> str:
+        payload = {"model": model, "temperature": temperature, "messages": messages}
+        return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    def clear_cache(self):
+        """Clear all cached responses"""
+        self._cache.clear()
+        if self._disk_cache:
+            self._disk_cache.clear()
+
     def get_response(self, messages: List[Dict], model: str = "openai/gpt-3.5-turbo", temperature: float = 0.7) -> str:
+        # Deterministic requests (temperature 0) can be served from the cache
+        cacheable = temperature == 0
+        if cacheable:
+            key = self._cache_key(messages, model, temperature)
+            if key in self._cache:
+                return self._cache[key]
+            if self._disk_cache:
+                content = self._disk_cache.get(key)
+                if content is not None:
+                    self._cache[key] = content
+                    return content
+
         try:
             payload = {
                 "model": model,
@@ -79,23 +107,161 @@ class OpenRouterClient:
                 "temperature": temperature,
                 "max_tokens": 1000
             }
-            
-            response = requests.post(
+
+            response = self.session.post(
+                self.base_url,
+                data=orjson.dumps(payload),
+                timeout=30
+            )
+
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+                content = data["choices"][0]["message"]["content"]
+                if cacheable:
+                    self._cache[key] = content
+                    if self._disk_cache:
+                        self._disk_cache.set(key, model, content)
+                return content
+            else:
+                return f"Error: {response.status_code} - {response.text}"
+
+        except Exception as e:
+            return f"Error connecting to AI service: {str(e)}"
+
+    def stream_response(self, messages: List[Dict], model: str = "openai/gpt-3.5-turbo", temperature: float = 0.7):
+        """Yield response content chunks from the streaming SSE endpoint"""
+        try:
+            payload = {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": 1000,
+                "stream": True
+            }
+
+            response = self.session.post(
+                self.base_url,
+                data=orjson.dumps(payload),
+                timeout=30,
+                stream=True
+            )
+
+            if response.status_code != 200:
+                yield f"Error: {response.status_code} - {response.text}"
+                return
+
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                decoded = line.decode()
+                # Per the SSE spec only "data:" fields carry payload;
+                # comment keep-alives (": OPENROUTER PROCESSING") and
+                # other fields are skipped rather than JSON-decoded
+                if not decoded.startswith("data:"):
+                    continue
+                data = decoded[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    content = orjson.loads(data)["choices"][0]["delta"].get("content", "")
+                except Exception:
+                    # A malformed chunk shouldn't abort the whole stream
+                    continue
+                if content:
+                    yield content
+
+        except Exception as e:
+            yield f"Error connecting to AI service: {str(e)}"
+
+    def _get_async_client(self):
+        """Return the pooled async client, creating it on first use"""
+        if self._async_client is None:
+            import httpx
+            self._async_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=20)
+            )
+        return self._async_client
+
+    async def aget_response(self, messages: List[Dict], model: str = "openai/gpt-3.5-turbo", temperature: float = 0.7) -> str:
+        """Async variant of get_response for concurrent requests"""
+        cacheable = temperature == 0
+        if cacheable:
+            key = self._cache_key(messages, model, temperature)
+            if key in self._cache:
+                return self._cache[key]
+            if self._disk_cache:
+                content = self._disk_cache.get(key)
+                if content is not None:
+                    self._cache[key] = content
+                    return content
+
+        try:
+            payload = {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": 1000
+            }
+
+            response = await self._get_async_client().post(
                 self.base_url,
                 headers=self.headers,
-                json=payload,
+                content=orjson.dumps(payload),
                 timeout=30
             )
-            
+
             if response.status_code == 200:
-                data = response.json()
-                return data["choices"][0]["message"]["content"]
+                data = orjson.loads(response.content)
+                content = data["choices"][0]["message"]["content"]
+                if cacheable:
+                    self._cache[key] = content
+                    if self._disk_cache:
+                        self._disk_cache.set(key, model, content)
+                return content
             else:
                 return f"Error: {response.status_code} - {response.text}"
-                
+
         except Exception as e:
             return f"Error connecting to AI service: {str(e)}"
 
+    def batch_get(self, messages_list: List[List[Dict]], model: str = "openai/gpt-3.5-turbo", temperature: float = 0.7) -> List[str]:
+        """Issue several requests concurrently and return their responses in order"""
+        async def gather_all():
+            return await asyncio.gather(
+                *[self.aget_response(messages, model, temperature) for messages in messages_list]
+            )
+
+        # One long-lived loop keeps the async client's connections valid
+        # across batches (asyncio.run would tear them down every call)
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(gather_all())
+
+# Emergency keyword matching over the shared config list, precompiled
+# once at import time
+_EMERGENCY_RE = re.compile(
+    "|".join(re.escape(keyword) for keyword in EMERGENCY_KEYWORDS),
+    re.IGNORECASE
+)
+def _build_emergency_automaton():
+    """Build an Aho-Corasick automaton over the emergency keywords
+
+    One byte-table lookup per input character regardless of keyword
+    count, so matching stays linear as the keyword list grows. Returns
+    None when pyahocorasick isn't installed; the regex is used instead.
+    """
+    try:
+        import ahocorasick
+    except ImportError:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword in EMERGENCY_KEYWORDS:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+_EMERGENCY_AUTOMATON = _build_emergency_automaton()
+
 class MedicalChatbot:
     def __init__(self):
         self.system_prompt = """You are a helpful medical assistant chatbot. Your role is to:
@@ -117,13 +283,13 @@ If a user describes severe symptoms like chest pain, difficulty breathing, sever
 Be empathetic, informative, and always prioritize user safety. Ask clarifying questions when needed."""
 
     def is_emergency(self, message: str) -> bool:
-        emergency_keywords = [
-            "chest pain", "can't breathe", "difficulty breathing", "severe bleeding",
-            "stroke", "heart attack", "suicide", "kill myself", "overdose",
-            "severe headache", "unconscious", "seizure", "choking"
-        ]
-        message_lower = message.lower()
-        return any(keyword in message_lower for keyword in emergency_keywords)
+        # Keywords match as substrings, so only a real substring scan is
+        # safe here; both matchers below are linear in the message length
+        if _EMERGENCY_AUTOMATON is not None:
+            # The automaton matches case-sensitively, so only this branch
+            # pays for a lowercased copy
+            return next(_EMERGENCY_AUTOMATON.iter(message.lower()), None) is not None
+        return bool(_EMERGENCY_RE.search(message))
     
     def get_emergency_response(self) -> str:
         return """🚨 **EMERGENCY ALERT** 🚨
@@ -139,6 +305,114 @@ This chatbot cannot handle emergency situations. Please seek immediate professio
 
 Are you safe right now? If not, please contact emergency services immediately."""
 
+@st.cache_resource
+def _load_token_encoding():
+    """Load the tiktoken encoding once per server process"""
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model("gpt-3.5-turbo")
+    except Exception:
+        return None
+
+def _count_tokens(text: str) -> int:
+    encoding = _load_token_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # Rough fallback when tiktoken is unavailable (~4 chars per token)
+    return len(text) // 4 + 1
+
+def _trim_history(messages: List[Dict], max_tokens: int = 3000) -> tuple:
+    """Keep the most recent messages that fit in the token budget
+
+    Returns (kept, dropped) where dropped is the older prefix that no
+    longer fits. Keeps prompt size bounded instead of growing with the
+    whole conversation every turn.
+    """
+    total = 0
+    kept = []
+    for i in range(len(messages) - 1, -1, -1):
+        total += _count_tokens(messages[i]["content"])
+        if total > max_tokens and kept:
+            return kept, messages[:i + 1]
+        kept.insert(0, messages[i])
+    return kept, []
+
+def _get_history_summary(client, dropped: List[Dict]) -> str:
+    """Summarize trimmed-off messages, recomputing only when more are dropped"""
+    if st.session_state.get("history_summary_count") != len(dropped):
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in dropped)
+        summary = client.get_response(
+            [
+                {"role": "system", "content": "Summarize this medical chat conversation in a few sentences, keeping symptoms, advice given, and other medically relevant details."},
+                {"role": "user", "content": transcript}
+            ],
+            model="anthropic/claude-3-haiku",
+            temperature=0.0
+        )
+        if not summary.startswith("Error"):
+            st.session_state.history_summary = summary
+            st.session_state.history_summary_count = len(dropped)
+    return st.session_state.get("history_summary", "")
+
+def _prewarm_quick_topics(client, system_prompt: str, model: str, topics: List[str]):
+    """Fetch Quick Topic responses concurrently to warm the response cache
+
+    Runs at temperature 0 so the answers land in the client's
+    deterministic cache; later clicks on the same topics become hits.
+    """
+    def fetch(topic):
+        client.get_response(
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": topic}
+            ],
+            model,
+            0.0
+        )
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        list(executor.map(fetch, topics))
+
+@st.cache_resource
+def _get_disk_cache() -> ResponseCache:
+    """One SQLite cache connection per server process"""
+    return ResponseCache()
+
+@st.cache_resource
+def get_client(api_key: str) -> OpenRouterClient:
+    """Reuse one pooled client (and its response cache) per API key"""
+    return OpenRouterClient(api_key, disk_cache=_get_disk_cache())
+
+@st.cache_resource
+def load_semantic_cache():
+    """Load the embedding model and semantic cache once per server process"""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+    model = SentenceTransformer("all-MiniLM-L6-v2")
+    cache = SemanticCache(model)
+    cache.warm(QUICK_HEALTH_TOPICS)
+    return cache
+
+def _build_chat_export() -> str:
+    """Build the export text with one join instead of string concatenation
+
+    Not cached: st.cache_data is shared across sessions while the
+    history is per-session, so any cache key short of the full content
+    risks serving another user's transcript.
+    """
+    parts = ["MedBot Chat History", "=" * 50, ""]
+    for chat in st.session_state.chat_history:
+        parts.extend([
+            f"[{chat['timestamp']}]",
+            f"You: {chat['user']}",
+            f"MedBot: {chat['bot']}",
+            "-" * 30,
+            ""
+        ])
+    return "\n".join(parts)
+
 def initialize_session_state():
     """Initialize session state variables"""
     if "messages" not in st.session_state:
@@ -163,21 +437,11 @@ def main():
     chatbot = MedicalChatbot()
     
     # Header
-    st.markdown("""
-    <div class="main-header">
-        <h1>🏥 MedBot - Your Medical Assistant</h1>
-        <p>AI-powered health information and guidance</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
+    _render_header()
+
     # Medical Disclaimer
-    st.markdown("""
-    <div class="disclaimer-box">
-        <h4>⚠️ Important Medical Disclaimer</h4>
-        <p>This chatbot provides general health information only and is not a substitute for professional medical advice, diagnosis, or treatment. Always consult with a qualified healthcare provider for medical concerns.</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
+    _render_disclaimer()
+
     # Emergency Button
     if st.button("🚨 EMERGENCY - Get Help Now", key="emergency"):
         st.markdown("""
@@ -199,7 +463,10 @@ def main():
             st.warning("Please enter your OpenRouter API key to start chatting.")
             st.info("Get your API key from: https://openrouter.ai/keys")
             return
-        
+
+        # Initialize OpenRouter client
+        client = get_client(api_key)
+
         # Model Selection
         model_options = {
             "GPT-3.5 Turbo": "openai/gpt-3.5-turbo",
@@ -222,7 +489,19 @@ def main():
         
         st.session_state.user_profile["age"] = age if age > 0 else None
         st.session_state.user_profile["gender"] = gender if gender != "Not specified" else None
-        
+
+        # Rebuild the profile context string only when age/gender change
+        profile = (st.session_state.user_profile["age"], st.session_state.user_profile["gender"])
+        if st.session_state.get("_last_profile") != profile:
+            st.session_state["_last_profile"] = profile
+            if profile[0] or profile[1]:
+                st.session_state.profile_context_str = (
+                    f"User profile: Age: {profile[0] or 'Not specified'}, Gender: {profile[1] or 'Not specified'}"
+                )
+            else:
+                st.session_state.profile_context_str = ""
+
+
         # Quick Health Topics
         st.header("🔗 Quick Topics")
         quick_topics = [
@@ -236,37 +515,65 @@ def main():
         
         for topic in quick_topics:
             if st.button(topic, key=f"topic_{topic}"):
+                # Same messages and temperature 0 as the prewarm, so this
+                # is normally served straight from the response cache
+                response = client.get_response(
+                    [
+                        {"role": "system", "content": chatbot.system_prompt},
+                        {"role": "user", "content": topic}
+                    ],
+                    selected_model,
+                    0.0
+                )
                 st.session_state.messages.append({"role": "user", "content": topic})
+                st.session_state.messages.append({"role": "assistant", "content": response})
+                st.session_state.chat_history.append({
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "user": topic,
+                    "bot": response
+                })
                 st.rerun()
         
-        # Clear Chat
+        # Clear Chat. Only this session's transcript is dropped; the
+        # response caches are shared across sessions and stay intact
+        # (clear_cache remains available as an explicit admin operation)
         if st.button("🗑️ Clear Chat History"):
             st.session_state.messages = []
             st.session_state.chat_history = []
             st.rerun()
     
+    # Warm the Quick Topic cache once per session, off the render path
+    if "prewarmed" not in st.session_state:
+        st.session_state.prewarmed = True
+        threading.Thread(
+            target=_prewarm_quick_topics,
+            args=(client, chatbot.system_prompt, selected_model, quick_topics),
+            daemon=True
+        ).start()
+
     # Main Chat Interface
     st.header("💬 Chat with MedBot")
-    
-    # Initialize OpenRouter client
-    client = OpenRouterClient(api_key)
-    
-    # Display chat messages
+
+    chat_pane(client, chatbot, selected_model, temperature)
+
+@st.fragment
+def chat_pane(client, chatbot, selected_model, temperature):
+    """Chat display, input and export; reruns are scoped to this pane
+
+    Running as a fragment means a chat turn re-executes only this
+    function, not the whole script (CSS, sidebar, header and all).
+    """
+    # Display chat messages in a single markdown call instead of one per message
     chat_container = st.container()
     with chat_container:
-        for message in st.session_state.messages:
-            if message["role"] == "user":
-                st.markdown(f"""
-                <div class="user-message">
-                    <strong>You:</strong> {message["content"]}
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div class="bot-message">
-                    <strong>MedBot:</strong> {message["content"]}
-                </div>
-                """, unsafe_allow_html=True)
+        if st.session_state.messages:
+            chat_html = "".join(
+                f'<div class="user-message"><strong>You:</strong> {html.escape(message["content"])}</div>'
+                if message["role"] == "user"
+                else f'<div class="bot-message"><strong>MedBot:</strong> {html.escape(message["content"])}</div>'
+                for message in st.session_state.messages
+            )
+            st.markdown(chat_html, unsafe_allow_html=True)
     
     # Chat input
     user_input = st.chat_input("Ask me about your health concerns...")
@@ -280,21 +587,55 @@ def main():
             emergency_response = chatbot.get_emergency_response()
             st.session_state.messages.append({"role": "assistant", "content": emergency_response})
         else:
-            # Prepare messages for API
-            api_messages = [{"role": "system", "content": chatbot.system_prompt}]
-            
+            # Prepare messages for API. The static system prompt must stay
+            # byte-identical and first so provider-side prompt-prefix caching
+            # can skip its prefill; dynamic context goes in separate messages
+            # after it.
+            if selected_model.startswith("anthropic/"):
+                # Anthropic prompt caching needs an explicit cache_control marker
+                api_messages = [{
+                    "role": "system",
+                    "content": [{
+                        "type": "text",
+                        "text": chatbot.system_prompt,
+                        "cache_control": {"type": "ephemeral"}
+                    }]
+                }]
+            else:
+                api_messages = [{"role": "system", "content": chatbot.system_prompt}]
+
             # Add user profile context if available
-            if st.session_state.user_profile["age"] or st.session_state.user_profile["gender"]:
-                profile_context = f"User profile: Age: {st.session_state.user_profile.get('age', 'Not specified')}, Gender: {st.session_state.user_profile.get('gender', 'Not specified')}"
+            profile_context = st.session_state.get("profile_context_str", "")
+            if profile_context:
                 api_messages.append({"role": "system", "content": profile_context})
             
-            # Add conversation history
-            api_messages.extend(st.session_state.messages)
-            
-            # Get AI response
-            with st.spinner("MedBot is thinking..."):
-                response = client.get_response(api_messages, selected_model, temperature)
+            # Add conversation history, trimmed to the token budget
+            history, dropped = _trim_history(st.session_state.messages)
+            if dropped:
+                summary = _get_history_summary(client, dropped)
+                if summary:
+                    api_messages.append({"role": "system", "content": f"Summary of earlier conversation: {summary}"})
+            api_messages.extend(history)
+
+            # The semantic cache is shared across sessions and keyed only
+            # on the question text, so it is safe only for standalone
+            # questions: follow-ups ("it got worse") embed alike across
+            # conversations but their answers depend on this session's
+            # history and profile. messages already holds the current
+            # input, so length 1 means no prior turns.
+            standalone = len(st.session_state.messages) == 1 and not profile_context
+            semantic_cache = load_semantic_cache() if standalone else None
+            cached_response = semantic_cache.lookup(user_input) if semantic_cache else None
+
+            if cached_response is not None:
+                st.session_state.messages.append({"role": "assistant", "content": cached_response})
+            else:
+                # Stream the response so tokens render as they arrive
+                with chat_container:
+                    response = st.write_stream(client.stream_response(api_messages, selected_model, temperature))
                 st.session_state.messages.append({"role": "assistant", "content": response})
+                if semantic_cache and not response.startswith("Error"):
+                    semantic_cache.add(user_input, response)
         
         # Save to chat history
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -303,20 +644,16 @@ def main():
             "user": user_input,
             "bot": st.session_state.messages[-1]["content"]
         })
-        
-        st.rerun()
-    
+
+        st.rerun(scope="fragment")
+
+
     # Chat History Export
     if st.session_state.chat_history:
         st.header("📋 Export Chat History")
         if st.button("Download Chat History"):
-            chat_text = "MedBot Chat History\n" + "="*50 + "\n\n"
-            for chat in st.session_state.chat_history:
-                chat_text += f"[{chat['timestamp']}]\n"
-                chat_text += f"You: {chat['user']}\n"
-                chat_text += f"MedBot: {chat['bot']}\n"
-                chat_text += "-"*30 + "\n\n"
-            
+            chat_text = _build_chat_export()
+
             st.download_button(
                 label="💾 Download as Text File",
                 data=chat_text,
@@ -0,0 +1,65 @@
+# SQLite-backed response cache for Medical Chatbot
+
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# Entries older than this are treated as expired
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+class ResponseCache:
+    """Persistent LLM response cache backed by SQLite
+
+    Keys are the SHA-256 payload hashes used by the in-memory cache, so
+    identical prompts deduplicate across sessions, users, and Streamlit
+    restarts. WAL mode keeps reads cheap while writes happen.
+    """
+
+    def __init__(self, path: str = "cache.db", ttl: float = DEFAULT_TTL_SECONDS):
+        self.ttl = ttl
+        # One connection shared across threads; the lock serializes
+        # execute/commit pairs so concurrent writers can't interleave
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS resp_cache("
+            "key TEXT PRIMARY KEY, model TEXT, content TEXT, ts REAL)"
+        )
+        self.purge_expired()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None if missing/expired"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT content, ts FROM resp_cache WHERE key=?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return row[0]
+
+    def set(self, key: str, model: str, content: str):
+        """Store a response under the key"""
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO resp_cache VALUES (?, ?, ?, ?)",
+                (key, model, content, time.time())
+            )
+            self.conn.commit()
+
+    def purge_expired(self):
+        """Delete entries older than the TTL"""
+        with self._lock:
+            self.conn.execute(
+                "DELETE FROM resp_cache WHERE ts < ?", (time.time() - self.ttl,)
+            )
+            self.conn.commit()
+
+    def clear(self):
+        """Delete all cached responses"""
+        with self._lock:
+            self.conn.execute("DELETE FROM resp_cache")
+            self.conn.commit()
@@ -0,0 +1,61 @@
+# Semantic response cache for Medical Chatbot
+
+import numpy as np
+from typing import List, Optional
+
+
+class SemanticCache:
+    """Cache LLM responses keyed by sentence embeddings.
+
+    Stores (embedding, response) pairs and returns a cached response when
+    a new prompt is semantically close enough (cosine similarity above the
+    threshold) to a previous one, avoiding a full LLM round-trip for
+    near-duplicate questions like the Quick Topic buttons.
+    """
+
+    def __init__(self, model, threshold: float = 0.92):
+        self.model = model
+        self.threshold = threshold
+        self._embeddings = None  # (N, dim) matrix of normalized embeddings
+        self._responses: List[str] = []
+        self._warm_embeddings = {}  # prompt -> precomputed embedding
+
+    def warm(self, prompts: List[str]):
+        """Precompute embeddings for known prompts (e.g. Quick Topics)
+
+        The first click on a warmed prompt still calls the LLM, but its
+        embedding is already computed, and every repeat becomes a cache hit.
+        """
+        embeddings = self.model.encode(list(prompts), normalize_embeddings=True)
+        for prompt, embedding in zip(prompts, embeddings):
+            self._warm_embeddings[prompt] = embedding
+
+    def _embed(self, prompt: str):
+        embedding = self._warm_embeddings.get(prompt)
+        if embedding is None:
+            embedding = self.model.encode(prompt, normalize_embeddings=True)
+        return embedding
+
+    def lookup(self, prompt: str) -> Optional[str]:
+        """Return a cached response for a semantically similar prompt, if any"""
+        if self._embeddings is None:
+            return None
+        similarities = self._embeddings @ self._embed(prompt)
+        best = int(np.argmax(similarities))
+        if similarities[best] > self.threshold:
+            return self._responses[best]
+        return None
+
+    def add(self, prompt: str, response: str):
+        """Store a response under the prompt's embedding"""
+        embedding = self._embed(prompt)
+        self._responses.append(response)
+        if self._embeddings is None:
+            self._embeddings = embedding.reshape(1, -1)
+        else:
+            self._embeddings = np.vstack([self._embeddings, embedding])
+
+    def clear(self):
+        """Clear all cached responses (warmed embeddings are kept)"""
+        self._embeddings = None
+        self._responses = []
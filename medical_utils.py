@@ -1,185 +1,332 @@
 import re
 import json
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from types import MappingProxyType
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple, Optional
 
+# Concerning symptom patterns, fused into one alternation so a single
+# scan of the message decides all five
+_CONCERNING_UNION = re.compile(
+    r"(?:pain.*(?:\d+|ten|severe|unbearable)"
+    r"|bleeding.*(?:\d+|hours|days)"
+    r"|fever.*(?:\d+|high|very)"
+    r"|can't.*sleep.*(?:\d+|days|weeks)"
+    r"|lost.*weight.*(?:\d+|pounds|kg))",
+    re.IGNORECASE
+)
+
+_INTERACTION_DISCLAIMER = "This is a basic check. Always consult your pharmacist or doctor for comprehensive interaction screening."
+
+# BMI category boundaries; bisect_right keeps each band's lower bound
+# inclusive, matching the original chained comparisons
+_BMI_THRESH = (18.5, 25.0, 30.0)
+_BMI_TABLE = (
+    ("Underweight", "Consider consulting with a healthcare provider about healthy weight gain."),
+    ("Normal weight", "Maintain your current healthy lifestyle."),
+    ("Overweight", "Consider lifestyle changes including diet and exercise. Consult a healthcare provider."),
+    ("Obese", "Strongly recommend consulting with a healthcare provider for a comprehensive health plan."),
+)
+
+
+def _today_str() -> str:
+    """Current date as YYYY-MM-DD, formatted at most once per day."""
+    now = datetime.now()
+    day = now.toordinal()
+    if _today_str._last[0] != day:
+        _today_str._last = [day, now.strftime("%Y-%m-%d")]
+    return _today_str._last[1]
+
+_today_str._last = [None, ""]
+
+# Vital-sign thresholds and status tables for table-driven classification.
+# Low readings keep their own strict cutoff; the tables cover the rest.
+_SYS_THRESH = (120, 130, 140, 180)
+_DIA_THRESH = (80, 80, 90, 120)
+_BP_STATUS = (
+    "Normal", "Elevated", "High Blood Pressure Stage 1",
+    "High Blood Pressure Stage 2", "Hypertensive Crisis - Seek immediate care"
+)
+_HR_THRESH = (100,)
+_HR_STATUS = ("Normal", "High (Tachycardia)")
+_TEMP_F_THRESH = (99.5, 100.3, 102)
+_TEMP_C_THRESH = (37.5, 37.9, 38.9)
+_TEMP_STATUS = (
+    "Normal", "Low-grade fever", "Moderate fever",
+    "High fever - seek medical attention"
+)
+
+@lru_cache(maxsize=128)
+def _health_tips(age_bucket: int, gender: str) -> Tuple[str, ...]:
+    """Build the tip list for an (age bucket, gender) pair, memoized
+
+    Buckets: 0 = under 18, 1 = 18-39, 2 = 40-64, 3 = 65 and over.
+    """
+    tips = [
+        "Stay hydrated by drinking plenty of water throughout the day",
+        "Aim for 7-9 hours of quality sleep each night",
+        "Eat a balanced diet rich in fruits, vegetables, and whole grains",
+        "Exercise regularly - aim for at least 150 minutes of moderate activity per week"
+    ]
+
+    # Age-specific tips
+    if age_bucket == 0:
+        tips.extend([
+            "Ensure you're getting enough calcium and vitamin D for bone development",
+            "Limit screen time and take regular breaks from devices"
+        ])
+    elif age_bucket == 1:
+        tips.extend([
+            "Establish healthy habits now to prevent chronic diseases later",
+            "Consider regular health screenings as recommended by your doctor"
+        ])
+    elif age_bucket == 2:
+        tips.extend([
+            "Schedule regular screenings for blood pressure, cholesterol, and diabetes",
+            "Consider bone density testing if at risk for osteoporosis"
+        ])
+    else:
+        tips.extend([
+            "Focus on fall prevention and balance exercises",
+            "Ensure you're up to date with vaccinations including flu and pneumonia"
+        ])
+
+    # Gender-specific tips
+    if gender == "female":
+        tips.extend([
+            "Don't forget regular mammograms and cervical cancer screenings",
+            "Ensure adequate iron intake, especially if menstruating"
+        ])
+    elif gender == "male":
+        tips.extend([
+            "Consider regular prostate health screenings after age 50",
+            "Be aware of heart disease risk factors"
+        ])
+
+    return tuple(tips)
+
+
+def _compile_keyword_union(keywords: Tuple[str, ...]):
+    """Compile keywords into one case-insensitive alternation, longest first"""
+    return re.compile(
+        "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)),
+        re.IGNORECASE
+    )
+
+def _build_keyword_automaton(urgent_keywords, emergency_keywords):
+    """Build an Aho-Corasick automaton classifying keyword hits
+
+    Returns None when pyahocorasick isn't installed.
+    """
+    try:
+        import ahocorasick
+    except ImportError:
+        return None
+    automaton = ahocorasick.Automaton()
+    # Add urgent first so emergency wins for keywords in both lists
+    for keyword in urgent_keywords:
+        automaton.add_word(keyword, "URGENT")
+    for keyword in emergency_keywords:
+        automaton.add_word(keyword, "EMERGENCY")
+    automaton.make_automaton()
+    return automaton
+
+
 class MedicalUtils:
     """Utility class for medical-related functions"""
-    
+
+    # Shared immutable tables, built once at class creation instead of
+    # per instance
+    emergency_keywords = (
+        "chest pain", "can't breathe", "difficulty breathing", "severe bleeding",
+        "stroke", "heart attack", "suicide", "kill myself", "overdose",
+        "severe headache", "unconscious", "seizure", "choking", "allergic reaction",
+        "severe abdominal pain", "high fever", "severe burn", "broken bone"
+    )
+
+    urgent_keywords = (
+        "high fever", "severe pain", "vomiting blood", "difficulty swallowing",
+        "sudden dizziness", "severe allergic reaction", "persistent vomiting",
+        "severe dehydration", "rapid heart rate", "confusion"
+    )
+
+    common_symptoms = MappingProxyType({
+        "fever": {
+            "description": "Elevated body temperature above 100.4°F (38°C)",
+            "when_to_seek_care": "If fever is above 103°F, lasts more than 3 days, or accompanied by severe symptoms"
+        },
+        "headache": {
+            "description": "Pain in the head or upper neck",
+            "when_to_seek_care": "If sudden, severe, or accompanied by neck stiffness, vision changes, or confusion"
+        },
+        "cough": {
+            "description": "Forceful expulsion of air from lungs",
+            "when_to_seek_care": "If persistent for more than 2 weeks, producing blood, or with difficulty breathing"
+        },
+        "sore throat": {
+            "description": "Pain or irritation in the throat",
+            "when_to_seek_care": "If severe, lasting more than a week, or with high fever"
+        }
+    })
+
+    # Derived matchers share the class-level tables; the automaton is a
+    # single-pass multi-pattern matcher, None when pyahocorasick isn't
+    # installed
+    _kw_automaton = _build_keyword_automaton(urgent_keywords, emergency_keywords)
+    _emergency_re = _compile_keyword_union(emergency_keywords)
+    _urgent_re = _compile_keyword_union(urgent_keywords)
+
     def __init__(self):
-        self.emergency_keywords = [
-            "chest pain", "can't breathe", "difficulty breathing", "severe bleeding",
-            "stroke", "heart attack", "suicide", "kill myself", "overdose",
-            "severe headache", "unconscious", "seizure", "choking", "allergic reaction",
-            "severe abdominal pain", "high fever", "severe burn", "broken bone"
-        ]
-        
-        self.urgent_keywords = [
-            "high fever", "severe pain", "vomiting blood", "difficulty swallowing",
-            "sudden dizziness", "severe allergic reaction", "persistent vomiting",
-            "severe dehydration", "rapid heart rate", "confusion"
-        ]
-        
-        self.common_symptoms = {
-            "fever": {
-                "description": "Elevated body temperature above 100.4°F (38°C)",
-                "when_to_seek_care": "If fever is above 103°F, lasts more than 3 days, or accompanied by severe symptoms"
-            },
-            "headache": {
-                "description": "Pain in the head or upper neck",
-                "when_to_seek_care": "If sudden, severe, or accompanied by neck stiffness, vision changes, or confusion"
-            },
-            "cough": {
-                "description": "Forceful expulsion of air from lungs",
-                "when_to_seek_care": "If persistent for more than 2 weeks, producing blood, or with difficulty breathing"
-            },
-            "sore throat": {
-                "description": "Pain or irritation in the throat",
-                "when_to_seek_care": "If severe, lasting more than a week, or with high fever"
-            }
+        # Memoized symptom lookups keyed by lowercased input
+        self._symptom_cache = {}
+
+        # This is a simplified version - in reality, you'd use a proper drug database
+        self.known_interactions = {
+            ("warfarin", "aspirin"): "Increased bleeding risk",
+            ("warfarin", "ibuprofen"): "Increased bleeding risk",
+            ("metformin", "alcohol"): "Risk of lactic acidosis",
+            ("statins", "grapefruit"): "Increased statin levels"
         }
-    
+        # frozenset keys make pair lookups order-insensitive with no
+        # per-probe sorting
+        self._interactions_fs = {
+            frozenset(pair): description
+            for pair, description in self.known_interactions.items()
+        }
+        # Each drug -> [(partner, description), ...] so checks walk known
+        # partners instead of probing every input pair
+        self._interaction_index = {}
+        for (drug_a, drug_b), description in self.known_interactions.items():
+            self._interaction_index.setdefault(drug_a, []).append((drug_b, description))
+            self._interaction_index.setdefault(drug_b, []).append((drug_a, description))
+        # Drugs appearing in any known interaction; fewer than two of
+        # these in the input means no interaction is possible
+        self._drugs_with_interactions = {
+            drug for pair in self.known_interactions for drug in pair
+        }
+
+    @classmethod
+    def _scan_keywords(cls, message: str) -> Optional[str]:
+        """Return the highest-priority keyword level found, if any"""
+        if cls._kw_automaton is not None:
+            # The automaton matches case-sensitively, so only this branch
+            # pays for a lowercased copy
+            level = None
+            for _, hit in cls._kw_automaton.iter(message.lower()):
+                if hit == "EMERGENCY":
+                    return "EMERGENCY"
+                level = hit
+            return level
+
+        # Fallback: one compiled case-insensitive union scan per level
+        if cls._emergency_re.search(message):
+            return "EMERGENCY"
+        if cls._urgent_re.search(message):
+            return "URGENT"
+        return None
+
     def assess_urgency(self, message: str) -> Tuple[str, str]:
         """
         Assess the urgency level of a medical message
         Returns: (urgency_level, explanation)
         """
-        message_lower = message.lower()
-        
-        # Check for emergency keywords
-        if any(keyword in message_lower for keyword in self.emergency_keywords):
-            return ("EMERGENCY", "This appears to be a medical emergency. Seek immediate medical attention.")
-        
-        # Check for urgent keywords
-        if any(keyword in message_lower for keyword in self.urgent_keywords):
-            return ("URGENT", "This may require prompt medical attention. Consider contacting a healthcare provider.")
-        
-        # Check for concerning patterns
-        if self._check_concerning_patterns(message_lower):
-            return ("MODERATE", "This should be evaluated by a healthcare provider if symptoms persist.")
-        
-        return ("LOW", "This appears to be a general health inquiry.")
+        return _assess_urgency_impl(message)
     
     def _check_concerning_patterns(self, message: str) -> bool:
         """Check for concerning symptom patterns"""
-        concerning_patterns = [
-            r"pain.*(\d+|ten|severe|unbearable)",
-            r"bleeding.*(\d+|hours|days)",
-            r"fever.*(\d+|high|very)",
-            r"can't.*sleep.*(\d+|days|weeks)",
-            r"lost.*weight.*(\d+|pounds|kg)",
-        ]
-        
-        return any(re.search(pattern, message) for pattern in concerning_patterns)
+        return _CONCERNING_UNION.search(message) is not None
     
     def get_symptom_info(self, symptom: str) -> Optional[Dict]:
         """Get information about a common symptom"""
         symptom_lower = symptom.lower()
+
+        # Exact symptom names resolve with one dict probe
+        info = self.common_symptoms.get(symptom_lower)
+        if info is not None:
+            return info
+
+        if symptom_lower in self._symptom_cache:
+            return self._symptom_cache[symptom_lower]
+
+        # Fall back to scanning for an embedded symptom name
+        result = None
         for key, info in self.common_symptoms.items():
             if key in symptom_lower:
-                return info
-        return None
+                result = info
+                break
+        self._symptom_cache[symptom_lower] = result
+        return result
     
     def calculate_bmi(self, weight_kg: float, height_m: float) -> Dict:
         """Calculate BMI and provide interpretation"""
-        bmi = weight_kg / (height_m ** 2)
-        
-        if bmi < 18.5:
-            category = "Underweight"
-            advice = "Consider consulting with a healthcare provider about healthy weight gain."
-        elif 18.5 <= bmi < 25:
-            category = "Normal weight"
-            advice = "Maintain your current healthy lifestyle."
-        elif 25 <= bmi < 30:
-            category = "Overweight"
-            advice = "Consider lifestyle changes including diet and exercise. Consult a healthcare provider."
-        else:
-            category = "Obese"
-            advice = "Strongly recommend consulting with a healthcare provider for a comprehensive health plan."
-        
+        bmi = weight_kg / (height_m * height_m)
+        category, advice = _BMI_TABLE[bisect_right(_BMI_THRESH, bmi)]
+
         return {
             "bmi": round(bmi, 1),
             "category": category,
             "advice": advice
         }
+
+    def calculate_bmi_batch(self, weights_kg: List[float], heights_m: List[float]) -> Dict:
+        """Vectorized BMI for many records at once
+
+        Returns rounded BMI values and indices into _BMI_TABLE rather
+        than per-record dicts, so callers can bulk-map categories.
+        """
+        import numpy as np
+
+        weights = np.asarray(weights_kg, dtype=np.float32)
+        heights = np.asarray(heights_m, dtype=np.float32)
+        bmi = weights / (heights * heights)
+
+        return {
+            "bmi": np.round(bmi, 1),
+            "category_idx": np.digitize(bmi, _BMI_THRESH)
+        }
     
+    def get_interaction(self, med1: str, med2: str) -> Optional[str]:
+        """Look up the interaction between two drugs, in either order"""
+        return self._interactions_fs.get(frozenset((med1.lower(), med2.lower())))
+
     def medication_interaction_check(self, medications: List[str]) -> Dict:
         """Basic medication interaction checker (simplified)"""
-        # This is a simplified version - in reality, you'd use a proper drug database
-        known_interactions = {
-            ("warfarin", "aspirin"): "Increased bleeding risk",
-            ("warfarin", "ibuprofen"): "Increased bleeding risk",
-            ("metformin", "alcohol"): "Risk of lactic acidosis",
-            ("statins", "grapefruit"): "Increased statin levels"
-        }
-        
+        # Most inputs contain no interacting drugs at all; one set
+        # intersection settles that before any pair is examined
+        candidates = {med.lower() for med in medications} & self._drugs_with_interactions
+        if len(candidates) < 2:
+            return {
+                "has_interactions": False,
+                "interactions": [],
+                "disclaimer": _INTERACTION_DISCLAIMER
+            }
+
         interactions = []
-        medications_lower = [med.lower() for med in medications]
-        
-        for i, med1 in enumerate(medications_lower):
-            for med2 in medications_lower[i+1:]:
-                interaction_key = tuple(sorted([med1, med2]))
-                if interaction_key in known_interactions:
+        for med in sorted(candidates):
+            for other, interaction in self._interaction_index.get(med, ()):
+                # `other > med` reports each pair exactly once
+                if other > med and other in candidates:
                     interactions.append({
-                        "medications": [med1, med2],
-                        "interaction": known_interactions[interaction_key]
+                        "medications": [med, other],
+                        "interaction": interaction
                     })
-        
+
         return {
             "has_interactions": len(interactions) > 0,
             "interactions": interactions,
-            "disclaimer": "This is a basic check. Always consult your pharmacist or doctor for comprehensive interaction screening."
+            "disclaimer": _INTERACTION_DISCLAIMER
         }
     
     def generate_health_tips(self, age: int, gender: str) -> List[str]:
         """Generate age and gender-appropriate health tips"""
-        tips = [
-            "Stay hydrated by drinking plenty of water throughout the day",
-            "Aim for 7-9 hours of quality sleep each night",
-            "Eat a balanced diet rich in fruits, vegetables, and whole grains",
-            "Exercise regularly - aim for at least 150 minutes of moderate activity per week"
-        ]
-        
-        # Age-specific tips
-        if age < 18:
-            tips.extend([
-                "Ensure you're getting enough calcium and vitamin D for bone development",
-                "Limit screen time and take regular breaks from devices"
-            ])
-        elif 18 <= age < 40:
-            tips.extend([
-                "Establish healthy habits now to prevent chronic diseases later",
-                "Consider regular health screenings as recommended by your doctor"
-            ])
-        elif 40 <= age < 65:
-            tips.extend([
-                "Schedule regular screenings for blood pressure, cholesterol, and diabetes",
-                "Consider bone density testing if at risk for osteoporosis"
-            ])
-        else:
-            tips.extend([
-                "Focus on fall prevention and balance exercises",
-                "Ensure you're up to date with vaccinations including flu and pneumonia"
-            ])
-        
-        # Gender-specific tips
-        if gender.lower() == "female":
-            tips.extend([
-                "Don't forget regular mammograms and cervical cancer screenings",
-                "Ensure adequate iron intake, especially if menstruating"
-            ])
-        elif gender.lower() == "male":
-            tips.extend([
-                "Consider regular prostate health screenings after age 50",
-                "Be aware of heart disease risk factors"
-            ])
-        
-        return tips
+        age_bucket = 0 if age < 18 else 1 if age < 40 else 2 if age < 65 else 3
+        return list(_health_tips(age_bucket, gender.lower()))
     
     def create_symptom_tracker(self) -> Dict:
         """Create a basic symptom tracking template"""
         return {
-            "date": datetime.now().strftime("%Y-%m-%d"),
+            "date": _today_str(),
             "symptoms": [],
             "severity": None,  # 1-10 scale
             "duration": None,
@@ -196,20 +343,17 @@ class MedicalUtils:
         if "systolic" in vitals and "diastolic" in vitals:
             systolic = vitals["systolic"]
             diastolic = vitals["diastolic"]
-            
+
             if systolic < 90 or diastolic < 60:
                 bp_status = "Low (Hypotension)"
-            elif systolic < 120 and diastolic < 80:
-                bp_status = "Normal"
-            elif systolic < 130 and diastolic < 80:
-                bp_status = "Elevated"
-            elif systolic < 140 or diastolic < 90:
-                bp_status = "High Blood Pressure Stage 1"
-            elif systolic < 180 or diastolic < 120:
-                bp_status = "High Blood Pressure Stage 2"
             else:
-                bp_status = "Hypertensive Crisis - Seek immediate care"
-            
+                sys_idx = bisect_right(_SYS_THRESH, systolic)
+                dia_idx = bisect_right(_DIA_THRESH, diastolic)
+                # Normal/Elevated require both readings under the cutoff,
+                # while the hypertensive stages apply when either is
+                hi = max(sys_idx, dia_idx)
+                bp_status = _BP_STATUS[hi if hi <= 1 else max(min(sys_idx, dia_idx), 2)]
+
             results["blood_pressure"] = {
                 "reading": f"{systolic}/{diastolic}",
                 "status": bp_status
@@ -220,11 +364,9 @@ class MedicalUtils:
             hr = vitals["heart_rate"]
             if hr < 60:
                 hr_status = "Low (Bradycardia)"
-            elif hr <= 100:
-                hr_status = "Normal"
             else:
-                hr_status = "High (Tachycardia)"
-            
+                hr_status = _HR_STATUS[bisect_left(_HR_THRESH, hr)]
+
             results["heart_rate"] = {
                 "reading": f"{hr} bpm",
                 "status": hr_status
@@ -236,28 +378,16 @@ class MedicalUtils:
             temp_unit = vitals.get("temp_unit", "F")
             
             if temp_unit.upper() == "F":
-                if temp < 97:
-                    temp_status = "Low"
-                elif temp <= 99.5:
-                    temp_status = "Normal"
-                elif temp <= 100.3:
-                    temp_status = "Low-grade fever"
-                elif temp <= 102:
-                    temp_status = "Moderate fever"
-                else:
-                    temp_status = "High fever - seek medical attention"
+                low_cutoff, thresholds = 97, _TEMP_F_THRESH
             else:  # Celsius
-                if temp < 36.1:
-                    temp_status = "Low"
-                elif temp <= 37.5:
-                    temp_status = "Normal"
-                elif temp <= 37.9:
-                    temp_status = "Low-grade fever"
-                elif temp <= 38.9:
-                    temp_status = "Moderate fever"
-                else:
-                    temp_status = "High fever - seek medical attention"
-            
+                low_cutoff, thresholds = 36.1, _TEMP_C_THRESH
+
+            if temp < low_cutoff:
+                temp_status = "Low"
+            else:
+                temp_status = _TEMP_STATUS[bisect_left(thresholds, temp)]
+
+
             results["temperature"] = {
                 "reading": f"{temp}°{temp_unit}",
                 "status": temp_status
@@ -267,58 +397,111 @@ class MedicalUtils:
     
     def get_medication_reminders(self, medications: List[Dict]) -> List[Dict]:
         """Generate medication reminders"""
-        reminders = []
         current_time = datetime.now()
-        
-        for med in medications:
-            if "schedule" in med and "last_taken" in med:
-                last_taken = datetime.fromisoformat(med["last_taken"])
-                interval_hours = med.get("interval_hours", 24)
-                next_dose = last_taken + timedelta(hours=interval_hours)
-                
-                if next_dose <= current_time:
-                    reminders.append({
-                        "medication": med["name"],
-                        "due_time": next_dose.strftime("%H:%M"),
-                        "overdue": True if current_time - next_dose > timedelta(hours=1) else False
-                    })
-        
+        scheduled = [med for med in medications if "schedule" in med and "last_taken" in med]
+        if not scheduled:
+            return []
+
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+
+        if np is not None and len(scheduled) >= 10:
+            # Parse and compare every timestamp in one vectorized pass
+            lasts = np.array([med["last_taken"] for med in scheduled], dtype="datetime64[ns]")
+            # Second resolution so fractional interval_hours (e.g. 0.5)
+            # survive; timedelta64[h] would reject or truncate them
+            intervals = np.array(
+                [round(float(med.get("interval_hours", 24)) * 3600) for med in scheduled],
+                dtype="timedelta64[s]"
+            )
+            next_doses = lasts + intervals
+            now = np.datetime64(current_time)
+            overdue_mask = (now - next_doses) > np.timedelta64(1, "h")
+
+            reminders = []
+            for i in np.nonzero(next_doses <= now)[0]:
+                next_dose = next_doses[i].astype("datetime64[s]").astype(datetime)
+                reminders.append({
+                    "medication": scheduled[i]["name"],
+                    "due_time": next_dose.strftime("%H:%M"),
+                    "overdue": bool(overdue_mask[i])
+                })
+            return reminders
+
+        reminders = []
+        for med in scheduled:
+            last_taken = datetime.fromisoformat(med["last_taken"])
+            interval_hours = med.get("interval_hours", 24)
+            next_dose = last_taken + timedelta(hours=interval_hours)
+
+            if next_dose <= current_time:
+                reminders.append({
+                    "medication": med["name"],
+                    "due_time": next_dose.strftime("%H:%M"),
+                    "overdue": True if current_time - next_dose > timedelta(hours=1) else False
+                })
+
         return reminders
     
     def format_health_summary(self, user_profile: Dict, recent_symptoms: List[Dict]) -> str:
         """Format a health summary for the user"""
-        summary = "## Your Health Summary\n\n"
-        
+        # Collect parts and join once instead of growing a string
+        parts = ["## Your Health Summary\n\n"]
+        profile = user_profile.get
+
         # Basic info
-        if user_profile.get("age"):
-            summary += f"**Age:** {user_profile['age']}\n"
-        if user_profile.get("gender"):
-            summary += f"**Gender:** {user_profile['gender']}\n"
-        
+        age = profile("age")
+        gender = profile("gender")
+        if age:
+            parts.append(f"**Age:** {age}\n")
+        if gender:
+            parts.append(f"**Gender:** {gender}\n")
+
         # Medical conditions
-        if user_profile.get("medical_conditions"):
-            summary += f"**Medical Conditions:** {', '.join(user_profile['medical_conditions'])}\n"
-        
+        conditions = profile("medical_conditions")
+        if conditions:
+            parts.append(f"**Medical Conditions:** {', '.join(conditions)}\n")
+
         # Allergies
-        if user_profile.get("allergies"):
-            summary += f"**Allergies:** {', '.join(user_profile['allergies'])}\n"
-        
+        allergies = profile("allergies")
+        if allergies:
+            parts.append(f"**Allergies:** {', '.join(allergies)}\n")
+
         # Recent symptoms
         if recent_symptoms:
-            summary += "\n**Recent Symptoms:**\n"
-            for symptom in recent_symptoms[-5:]:  # Last 5 symptoms
-                summary += f"- {symptom.get('date', 'Unknown date')}: {symptom.get('description', 'No description')}\n"
-        
+            parts.append("\n**Recent Symptoms:**\n")
+            parts.extend(
+                f"- {symptom.get('date', 'Unknown date')}: {symptom.get('description', 'No description')}\n"
+                for symptom in recent_symptoms[-5:]  # Last 5 symptoms
+            )
+
         # Health tips
-        if user_profile.get("age") and user_profile.get("gender"):
-            tips = self.generate_health_tips(user_profile["age"], user_profile["gender"])
-            summary += "\n**Personalized Health Tips:**\n"
-            for tip in tips[:3]:  # Top 3 tips
-                summary += f"- {tip}\n"
-        
-        summary += "\n*Remember: This summary is for informational purposes only. Always consult with healthcare professionals for medical advice.*"
-        
-        return summary
+        if age and gender:
+            tips = self.generate_health_tips(age, gender)
+            parts.append("\n**Personalized Health Tips:**\n")
+            parts.extend(f"- {tip}\n" for tip in tips[:3])  # Top 3 tips
+
+        parts.append("\n*Remember: This summary is for informational purposes only. Always consult with healthcare professionals for medical advice.*")
+
+        return "".join(parts)
+
+
+@lru_cache(maxsize=1024)
+def _assess_urgency_impl(message: str) -> Tuple[str, str]:
+    """Memoized urgency assessment; safe because the matchers are static"""
+    level = MedicalUtils._scan_keywords(message)
+    if level == "EMERGENCY":
+        return ("EMERGENCY", "This appears to be a medical emergency. Seek immediate medical attention.")
+    if level == "URGENT":
+        return ("URGENT", "This may require prompt medical attention. Consider contacting a healthcare provider.")
+
+    # Check for concerning patterns
+    if _CONCERNING_UNION.search(message):
+        return ("MODERATE", "This should be evaluated by a healthcare provider if symptoms persist.")
+
+    return ("LOW", "This appears to be a general health inquiry.")
 
 
 class DrugDatabase:
@@ -354,74 +537,76 @@ class DrugDatabase:
                 "side_effects": ["Stomach irritation", "Increased bleeding", "Ringing in ears (high doses)"]
             }
         }
-    
+
+        # Lowercased brand name -> generic key for O(1) brand lookups
+        self._brand_index = {
+            brand.lower(): generic
+            for generic, info in self.drugs.items()
+            for brand in info["brand_names"]
+        }
+
+        # One flattened lowercase searchable string per drug, so a query
+        # needs a single substring scan per drug instead of one per field
+        self._search_blob = [
+            (
+                generic,
+                " ".join(
+                    [generic]
+                    + [brand.lower() for brand in info["brand_names"]]
+                    + [use.lower() for use in info["common_uses"]]
+                )
+            )
+            for generic, info in self.drugs.items()
+        ]
+
     def get_drug_info(self, drug_name: str) -> Optional[Dict]:
         """Get information about a specific drug"""
         drug_name_lower = drug_name.lower()
-        
+
         # Direct match
-        if drug_name_lower in self.drugs:
-            return self.drugs[drug_name_lower]
-        
+        info = self.drugs.get(drug_name_lower)
+        if info is not None:
+            return info
+
         # Check brand names
-        for generic, info in self.drugs.items():
-            brand_names_lower = [brand.lower() for brand in info["brand_names"]]
-            if drug_name_lower in brand_names_lower:
-                return info
-        
-        return None
+        generic = self._brand_index.get(drug_name_lower)
+        return self.drugs[generic] if generic else None
     
     def search_drugs(self, query: str) -> List[Dict]:
         """Search for drugs matching a query"""
-        results = []
         query_lower = query.lower()
-        
-        for generic, info in self.drugs.items():
-            # Check generic name
-            if query_lower in generic:
-                results.append({"name": generic, "info": info})
-                continue
-            
-            # Check brand names
-            for brand in info["brand_names"]:
-                if query_lower in brand.lower():
-                    results.append({"name": generic, "info": info})
-                    break
-            
-            # Check uses
-            for use in info["common_uses"]:
-                if query_lower in use.lower():
-                    results.append({"name": generic, "info": info})
-                    break
-        
-        return results
+        return [
+            {"name": generic, "info": self.drugs[generic]}
+            for generic, blob in self._search_blob
+            if query_lower in blob
+        ]
 
 
 class HealthAssessment:
     """Health assessment and risk evaluation tools"""
     
     def __init__(self):
+        # Frozensets turn the per-factor membership tests into O(1) probes
         self.risk_factors = {
-            "cardiovascular": [
-                "smoking", "high_blood_pressure", "high_cholesterol", 
+            "cardiovascular": frozenset([
+                "smoking", "high_blood_pressure", "high_cholesterol",
                 "diabetes", "family_history", "obesity", "sedentary_lifestyle"
-            ],
-            "diabetes": [
+            ]),
+            "diabetes": frozenset([
                 "obesity", "family_history", "high_blood_pressure",
                 "sedentary_lifestyle", "age_over_45", "gestational_diabetes"
-            ],
-            "osteoporosis": [
+            ]),
+            "osteoporosis": frozenset([
                 "female", "age_over_50", "smoking", "low_calcium",
                 "sedentary_lifestyle", "family_history", "thin_build"
-            ]
+            ])
         }
     
     def assess_cardiovascular_risk(self, risk_factors: List[str], age: int) -> Dict:
         """Assess cardiovascular disease risk"""
-        applicable_factors = [
-            factor for factor in risk_factors 
-            if factor in self.risk_factors["cardiovascular"]
-        ]
+        applicable_factors = sorted(
+            set(risk_factors) & self.risk_factors["cardiovascular"]
+        )
         
         risk_score = len(applicable_factors)
         